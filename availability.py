@@ -0,0 +1,339 @@
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from model import ner_model, intent_model
+
+WEEKDAYS = ["월요일", "화요일", "수요일", "목요일", "금요일", "토요일", "일요일"]
+SHORT_WEEKDAYS = ["월", "화", "수", "목", "금", "토", "일"]
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAY_START_HOUR = 9     # 후보로 제안할 시간대 (09:00 ~ 24:00, '밤 11시' 도 후보가 되도록)
+DAY_END_HOUR = 24
+DEFAULT_HOUR = 17      # 시간이 없으면 오후 5시를 우선 (gpt.py 규칙과 동일)
+
+# 시간대 표현 → (시작, 끝) 시각
+DURATIONS = {
+    "아침": (8, 10),
+    "오전": (9, 12),
+    "점심": (12, 14),
+    "정오": (12, 13),
+    "오후": (13, 18),
+    "저녁": (18, 21),
+    "밤": (20, 23),
+}
+
+
+def _rule(days=None, start=None, end=None, week=None, available=True) -> dict:
+    """참여자 한 명의 가능/불가능 조건 하나
+
+    days: 요일 인덱스 목록(월=0), None 이면 모든 요일
+    start, end: 시각(시간 단위, 18.5 = 18:30), None 이면 하루 전체
+    week: 기준일로부터 몇 번째 주인지(0 = 이번 주), None 이면 전체 기간
+    available: False 면 해당 칸을 불가능으로 표시
+    """
+    return {"days": days, "start": start, "end": end, "week": week, "available": available}
+
+
+# '월,화 가능', '월화수 제외' 처럼 줄여 쓴 요일 묶음 (다른 글자·숫자·'요일' 과 붙어 있으면 제외)
+SHORT_GROUP = re.compile(r"(?<![가-힣\d])[월화수목금토일](?:[,\s·/]*[월화수목금토일])+(?!요|\d)")
+DAY_WORDS = re.compile("|".join(WEEKDAYS) + "|주말|평일")
+
+
+def _mask(text: str) -> str:
+    """전체 요일 이름과 '6월 13일' 같은 날짜를 같은 길이의 공백으로 (줄임말로 읽지 않도록, 위치는 유지)"""
+    blank = lambda m: " " * len(m.group())
+    return re.sub(r"\d+\s*[월일]", blank, re.sub("|".join(WEEKDAYS), blank, text))
+
+
+def _short_groups(text: str):
+    for m in SHORT_GROUP.finditer(_mask(text)):
+        chars = [ch for ch in m.group() if ch in SHORT_WEEKDAYS]
+        # '수수료' 처럼 같은 글자가 반복되면 요일 묶음이 아님
+        if len(set(chars)) == len(chars):
+            yield m, chars
+
+
+def _parse_days(text: str) -> List[int]:
+    days = [i for i, wd in enumerate(WEEKDAYS) if wd in text]
+    for _, chars in _short_groups(text):
+        days.extend(SHORT_WEEKDAYS.index(ch) for ch in chars)
+    if "주말" in text:
+        days.extend([5, 6])
+    if "평일" in text:
+        days.extend(range(5))
+    return sorted(set(days))
+
+
+def _has_predicate(part: str) -> bool:
+    """요일·시각·조사를 빼고도 남는 말('돼', '안돼', '가능' 등)이 있는지"""
+    rest = DAY_WORDS.sub(" ", part)
+    for m, _ in _short_groups(rest):
+        rest = rest[:m.start()] + " " * len(m.group()) + rest[m.end():]
+    rest = re.sub(r"\d{1,2}(?::\d{2}|\s*시(?:\s*\d{1,2}\s*분|\s*반)?)|" + "|".join(DURATIONS), " ", rest)
+    rest = re.sub(r"(?<!\S)(?:은|는|이나|나|랑|이랑|하고|도|에|에는|이든|든)(?!\S)|[,.·/!?~]", " ", rest)
+    return bool(rest.strip())
+
+
+def _split_days(text: str) -> List[str]:
+    """요일 언급마다 문장을 나눔 ('금요일 안돼 토요일은 돼' → ['금요일 안돼 ', '토요일은 돼'])"""
+    starts = sorted({m.start() for m in DAY_WORDS.finditer(text)} | {m.start() for m, _ in _short_groups(text)})
+    if len(starts) <= 1:
+        return [text]
+    cuts = [0] + starts[1:] + [len(text)]
+    return [text[a:b] for a, b in zip(cuts, cuts[1:])]
+
+
+def _parse_hours(text: str, entities: list):
+    """언급된 시각/시간대를 (start, end) 로. 없으면 None"""
+    m = (re.search(r"(\d{1,2}):(\d{2})", text)
+         or re.search(r"(\d{1,2})\s*시\s*(?:(\d{1,2})\s*분|(반))?", text))
+    if m and int(m[1]) < 24:
+        hour = int(m[1])
+        minute = int(m[2]) if m[2] else (30 if m.lastindex == 3 and m[3] else 0)
+        # '7시', '6시 반' 처럼 오전을 명시하지 않은 1~8시는 오후로 보고, 9~11시는 오후 표현이 있을 때만 오후로 봄
+        if hour < 12 and "오전" not in text and "아침" not in text:
+            if hour <= 8 or re.search(r"오후|저녁|밤", text):
+                hour += 12
+        start = hour + (0.5 if minute >= 30 else 0)
+        if re.search(r"이후|부터|넘어서", text):
+            return start, DAY_END_HOUR
+        if re.search(r"이전|전까지|까지", text):
+            return DAY_START_HOUR, start
+        # 늦은 시각은 하루 끝에서 자름 (그 시각 칸은 포함)
+        return start, min(start + 2, DAY_END_HOUR)
+    for word, tag in entities:
+        if tag == "TI_DURATION" and word in DURATIONS:
+            return DURATIONS[word]
+    for word, span in DURATIONS.items():
+        if word in text:
+            return span
+    return None
+
+
+def has_times(rules: Dict[str, List[dict]]) -> bool:
+    """모든 참여자가 구체적인 시각/시간대가 있는 가능 조건을 하나 이상 말했는지"""
+    return bool(rules) and all(
+        any(r["available"] and r["start"] is not None for r in person_rules)
+        for person_rules in rules.values()
+    )
+
+
+def rules_from_dialogue(conv: List[dict]) -> Dict[str, List[dict]]:
+    """대화({"person", "text"} 목록)에서 참여자별 조건을 뽑는다
+
+    ner_model 로 요일/시간 표현을, intent_model 로 가능(+)/불가능(-)을 판단하며
+    시간 관련 언급이 없는 참여자는 제외한다.
+    '금요일 안돼 토요일은 돼' 처럼 요일마다 판단이 다른 메시지는 요일별 절로 나눠 각각 판단하고,
+    '금요일 토요일 안돼' 처럼 판단이 없는 절은 뒤따르는 절의 판단을 따른다.
+    """
+    # (사람, 메시지 전체, 절) 목록
+    pieces = []
+    for d in conv:
+        parts = _split_days(d["text"])
+        pending = ""
+        for i, part in enumerate(parts):
+            pending += part
+            if _has_predicate(part) or i == len(parts) - 1:
+                pieces.append((d["person"], d["text"], pending))
+                pending = ""
+
+    clauses = [clause for _, _, clause in pieces]
+    entities = ner_model(clauses)
+    intents = intent_model(clauses)
+
+    rules = {}
+    for (person, message, text), ents, intent in zip(pieces, entities, intents):
+        days = _parse_days(text) or None
+        hours = _parse_hours(text, ents)
+        week = None
+        # '다음주 금요일 안돼 토요일은 돼' 처럼 주는 메시지 전체에 적용
+        if "다다음주" in message or "다다음 주" in message:
+            week = 2
+        elif "다음주" in message or "다음 주" in message:
+            week = 1
+        elif "이번주" in message or "이번 주" in message:
+            week = 0
+        if days is None and hours is None and week is None:
+            continue
+
+        start, end = hours if hours else (None, None)
+        person_rules = rules.setdefault(person, [])
+        if re.search(r"빼고|제외|말고", text) and days:
+            person_rules.append(_rule(days=days, week=week, available=False))
+        elif intent == "-":
+            person_rules.append(_rule(days, start, end, week, available=False))
+        else:
+            person_rules.append(_rule(days, start, end, week))
+    return rules
+
+
+class AvailabilityGrid:
+    """기준일부터 horizon_days 동안을 30분 칸으로 나눈 참여자별 가능 여부 비트맵"""
+
+    def __init__(self, reference: datetime, horizon_days: int = 28):
+        self.reference = reference
+        self.start = datetime(reference.year, reference.month, reference.day)
+        self.horizon_days = horizon_days
+
+        day_index = np.arange(horizon_days)
+        self.weekday = (self.start.weekday() + day_index) % 7
+        # 기준일이 속한 주를 0 으로 하는 주 번호
+        self.week = (self.start.weekday() + day_index) // 7
+        slot_hours = np.arange(SLOTS_PER_DAY) * SLOT_MINUTES / 60
+        self.slot_hours = slot_hours
+
+        # 제안 가능한 칸: 활동 시간대이면서 기준 시각 이후
+        daytime = (slot_hours >= DAY_START_HOUR) & (slot_hours < DAY_END_HOUR)
+        self.open = np.broadcast_to(daytime, (horizon_days, SLOTS_PER_DAY)).copy()
+        elapsed = (reference - self.start).total_seconds() / 60
+        self.open[0, : int(np.ceil(elapsed / SLOT_MINUTES))] = False
+
+    def _masks(self, rules: List[dict]) -> np.ndarray:
+        """조건 여러 개를 한 번에 (조건 수, 날짜 수, 칸 수) bool 배열로"""
+        n = len(rules)
+        day_sel = np.ones((n, self.horizon_days), dtype=bool)
+        time_sel = np.ones((n, SLOTS_PER_DAY), dtype=bool)
+        weekday_table = np.zeros((n, 7), dtype=bool)
+        has_days = np.zeros(n, dtype=bool)
+        week = np.full(n, -1)
+        start = np.full(n, -np.inf)
+        end = np.full(n, np.inf)
+        for i, r in enumerate(rules):
+            if r["days"] is not None:
+                has_days[i] = True
+                weekday_table[i, r["days"]] = True
+            if r["week"] is not None:
+                week[i] = r["week"]
+            if r["start"] is not None:
+                start[i], end[i] = r["start"], r["end"]
+
+        day_sel &= weekday_table[:, self.weekday] | ~has_days[:, None]
+        day_sel &= (self.week[None, :] == week[:, None]) | (week[:, None] < 0)
+        time_sel &= (self.slot_hours[None, :] >= start[:, None]) & (self.slot_hours[None, :] < end[:, None])
+        return day_sel[:, :, None] & time_sel[:, None, :]
+
+    def bitmaps(self, rules: Dict[str, List[dict]]) -> np.ndarray:
+        """참여자 수 x 칸 수 비트맵 (칸 8개를 1바이트로 묶은 uint8 행렬)"""
+        flat = [(i, r) for i, person_rules in enumerate(rules.values()) for r in person_rules]
+        owner = np.array([i for i, _ in flat], dtype=np.intp)
+        available = np.array([r["available"] for _, r in flat], dtype=bool)
+        masks = np.packbits(self._masks([r for _, r in flat]).reshape(len(flat), -1), axis=1)
+
+        # 참여자별로 가능 조건은 OR, 불가능 조건은 OR 한 뒤 빼기 (owner 는 정렬되어 있음)
+        positive = np.full((len(rules), masks.shape[1]), 0xFF, dtype=np.uint8)
+        negative = np.zeros_like(positive)
+        for target, sel in ((positive, available), (negative, ~available)):
+            if not sel.any():
+                continue
+            people, first = np.unique(owner[sel], return_index=True)
+            if len(people) == sel.sum():
+                target[people] = masks[sel]
+            else:
+                target[people] = np.bitwise_or.reduceat(masks[sel], first, axis=0)
+        return positive & ~negative & np.packbits(self.open)[None, :]
+
+    def counts(self, rules: Dict[str, List[dict]]) -> np.ndarray:
+        """칸마다 가능한 참여자 수 (날짜 수 x 하루 칸 수)"""
+        slots = self.horizon_days * SLOTS_PER_DAY
+        bits = np.unpackbits(self.bitmaps(rules), axis=1, count=slots)
+        return bits.sum(axis=0, dtype=np.int32).reshape(self.horizon_days, SLOTS_PER_DAY)
+
+    def rank(self, rules: Dict[str, List[dict]], k: int = 4) -> List[dict]:
+        """가능한 사람이 가장 많은 칸을 날짜별로 하나씩 골라 상위 k 개 반환"""
+        if not rules:
+            return []
+        counts = self.counts(rules)
+
+        # 같은 인원이면 기본 시각(17:00)에 가까운 칸을 우선
+        closeness = -np.abs(self.slot_hours - DEFAULT_HOUR)
+        score = counts * 100.0 + closeness
+        best_slot = score.argmax(axis=1)
+        best_count = counts[np.arange(self.horizon_days), best_slot]
+
+        # 인원 많은 순, 같으면 빠른 날짜 순
+        order = np.lexsort((np.arange(self.horizon_days), -best_count))
+        candidates = []
+        for day in order[:k]:
+            if best_count[day] == 0:
+                break
+            when = self.start + timedelta(days=int(day), minutes=int(best_slot[day]) * SLOT_MINUTES)
+            candidates.append({"datetime": when, "count": int(best_count[day]), "total": len(rules)})
+        return candidates
+
+
+def format_slot(when: datetime) -> str:
+    return f"{when.year}년 {when.month}월 {when.day}일 {WEEKDAYS[when.weekday()]} {when:%H:%M}"
+
+
+def find_common_times(conv: List[dict], reference: Optional[datetime] = None,
+                      horizon_days: int = 28, k: int = 4) -> List[dict]:
+    """대화에서 참여자별 조건을 뽑아 공통 가능 시간을 순위대로 반환
+
+    각 후보의 "timed" 는 모든 참여자가 시각을 직접 말했는지 여부 (아니면 기본 시각으로 고른 칸)
+    """
+    rules = rules_from_dialogue(conv)
+    grid = AvailabilityGrid(reference or datetime.now(), horizon_days)
+    timed = has_times(rules)
+    candidates = grid.rank(rules, k)
+    for c in candidates:
+        c["timed"] = timed
+    return candidates
+
+
+if __name__ == "__main__":
+    # 요일/시각 파싱 회귀 확인: python availability.py
+    day_cases = {
+        "금요일 토요일 가능": [4, 5],
+        "월요일 화요일 돼": [0, 1],
+        "6월 13일 금요일": [4],
+        "수수료가 비싸": [],
+        "월,화 빼고 다 가능": [0, 1],
+        "월화수 제외하고": [0, 1, 2],
+        "토일 괜찮아": [5, 6],
+        "주말 가능": [5, 6],
+    }
+    hour_cases = {
+        "금요일 18:30 가능": (18.5, 20.5),
+        "6시 반 괜찮아": (18.5, 20.5),
+        "7시": (19, 21),
+        "11시": (11, 13),
+        "밤 10시": (22, 24),
+        "밤 11시": (23, 24),
+        "12시 점심": (12, 14),
+        "오전 9시 30분": (9.5, 11.5),
+        "6시 이후": (18, DAY_END_HOUR),
+    }
+    failed = 0
+    for text, expected in day_cases.items():
+        got = _parse_days(text)
+        if got != expected:
+            failed += 1
+            print(f"❌ _parse_days({text!r}) = {got}, 기대값 {expected}")
+    for text, expected in hour_cases.items():
+        got = _parse_hours(text, [])
+        if got != expected:
+            failed += 1
+            print(f"❌ _parse_hours({text!r}) = {got}, 기대값 {expected}")
+    # 요일마다 판단이 다른 메시지: {메시지: [(요일, 가능 여부), ...]}
+    rule_cases = {
+        "나 금요일 안돼 토요일은 돼": [([4], False), ([5], True)],
+        "금요일 토요일 안돼": [([4, 5], False)],
+        "금요일 토요일 가능": [([4, 5], True)],
+    }
+    for text, expected in rule_cases.items():
+        got = [(r["days"], r["available"]) for r in rules_from_dialogue([{"person": "a", "text": text}])["a"]]
+        if got != expected:
+            failed += 1
+            print(f"❌ rules_from_dialogue({text!r}) = {got}, 기대값 {expected}")
+    late = find_common_times([{"person": "a", "text": "밤 11시 가능"}, {"person": "b", "text": "밤 11시 가능"}],
+                             datetime(2025, 10, 20, 10))
+    if not late or late[0]["datetime"].hour != 23:
+        failed += 1
+        print(f"❌ '밤 11시 가능' 공통 시간 = {late[:1]}, 기대값 23:00")
+    total = len(day_cases) + len(hour_cases) + len(rule_cases) + 1
+    print(f"✅ {total - failed}/{total} 통과")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+import shutil
+
+
+class DialogueLog:
+    """채팅별 대화 기록을 디스크에 남기는 append-only 로그
+
+    - dialogue_logs/<chat_id>/<번호>.log 에 한 줄에 한 메시지씩 ["이름", "내용"] 형식으로 기록
+    - 쓰기는 모아서 flush_interval 마다 한 번에 fsync (그 사이 장애 시 최대 그만큼만 유실)
+    - 세그먼트가 segment_bytes 를 넘으면 다음 번호의 파일로 넘어감
+    - /clear, /finalize 시 해당 채팅의 로그를 통째로 삭제
+    """
+
+    def __init__(self, root: str = "dialogue_logs", flush_interval: float = 0.5,
+                 max_batch: int = 256, segment_bytes: int = 256 * 1024):
+        self.root = root
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.segment_bytes = segment_bytes
+
+        self._pending = []      # ("append", cid, line) 또는 ("truncate", cid, None)
+        self._flush_handle = None
+        self._lock = None
+        self._segments = {}     # cid -> 현재 세그먼트 번호
+        self._own_from = {}     # cid -> 이 프로세스가 처음 만든 세그먼트 번호 (복구 시 제외)
+        self._tasks = set()     # 예약된 flush 작업 (참조를 유지해야 중간에 사라지지 않음)
+
+    def append(self, cid, person: str, text: str):
+        line = json.dumps([person, text], ensure_ascii=False, separators=(",", ":")) + "\n"
+        self._push(("append", cid, line))
+
+    def truncate(self, cid):
+        self._push(("truncate", cid, None))
+
+    def _push(self, op):
+        self._pending.append(op)
+        loop = asyncio.get_running_loop()
+        if len(self._pending) >= self.max_batch:
+            self._spawn_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_interval, self._spawn_flush)
+
+    def _spawn_flush(self):
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def flush(self):
+        """쌓인 기록을 별도 스레드에서 디스크에 쓰고 fsync 한다"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        # 배치 순서가 뒤섞이지 않도록 한 번에 하나씩 기록
+        async with self._get_lock():
+            batch, self._pending = self._pending, []
+            if batch:
+                try:
+                    await asyncio.to_thread(self._write_batch, batch)
+                except OSError as e:
+                    print("❌ 대화 로그 기록 실패:", e)
+
+    def _chat_dir(self, cid) -> str:
+        return os.path.join(self.root, str(cid))
+
+    def _segment_path(self, cid, seq: int) -> str:
+        return os.path.join(self._chat_dir(cid), f"{seq:06d}.log")
+
+    def _current_segment(self, cid) -> int:
+        seq = self._segments.get(cid)
+        if seq is None:
+            # 재시작 후에는 새 세그먼트로 시작해 잘린 마지막 줄 뒤에 이어 쓰지 않도록 함
+            names = [n for n in os.listdir(self._chat_dir(cid)) if n.endswith(".log")]
+            seq = max((int(n[:-4]) for n in names), default=0) + 1
+            self._segments[cid] = seq
+            # 이 번호부터는 지금 실행 중에 받은 메시지이므로 load() 에서 다시 읽지 않음
+            self._own_from[cid] = seq
+        return seq
+
+    def _write_batch(self, batch: list):
+        # truncate 이후의 기록만 남도록 채팅별로 순서대로 정리
+        lines = {}
+        truncated = set()
+        for op, cid, line in batch:
+            if op == "truncate":
+                lines.pop(cid, None)
+                truncated.add(cid)
+            else:
+                lines.setdefault(cid, []).append(line)
+
+        for cid in truncated:
+            shutil.rmtree(self._chat_dir(cid), ignore_errors=True)
+            self._segments.pop(cid, None)
+
+        for cid, chat_lines in lines.items():
+            os.makedirs(self._chat_dir(cid), exist_ok=True)
+            seq = self._current_segment(cid)
+            path = self._segment_path(cid, seq)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            # 배치 중간에도 segment_bytes 를 넘기 전에 다음 세그먼트로 넘어감
+            chunks = [[]]
+            for line in chat_lines:
+                length = len(line.encode("utf-8"))
+                if size and size + length > self.segment_bytes:
+                    chunks.append([])
+                    size = 0
+                chunks[-1].append(line)
+                size += length
+            for i, chunk in enumerate(chunks):
+                if i:
+                    seq += 1
+                    self._segments[cid] = seq
+                    path = self._segment_path(cid, seq)
+                if not chunk:
+                    continue
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("".join(chunk))
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def _read_all(self) -> dict:
+        restored = {}
+        if not os.path.isdir(self.root):
+            return restored
+        for name in os.listdir(self.root):
+            try:
+                cid = int(name)
+            except ValueError:
+                continue
+            chat_dir = self._chat_dir(cid)
+            own_from = self._own_from.get(cid)
+            messages = []
+            try:
+                segments = sorted(n for n in os.listdir(chat_dir) if n.endswith(".log"))
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            for seg in segments:
+                if own_from is not None and int(seg[:-4]) >= own_from:
+                    # 복구 중에 받은 메시지는 이미 메모리에 있음
+                    continue
+                try:
+                    with open(os.path.join(chat_dir, seg), "r", encoding="utf-8") as f:
+                        for line in f:
+                            try:
+                                person, text = json.loads(line)
+                            except ValueError:
+                                # 기록 도중 중단되어 잘린 마지막 줄은 무시
+                                continue
+                            messages.append({"person": person, "text": text})
+                except FileNotFoundError:
+                    # 읽는 사이 초기화되어 지워진 채팅
+                    messages = []
+                    break
+            if messages:
+                restored[cid] = messages
+        return restored
+
+    async def load(self) -> dict:
+        """저장된 대화를 별도 스레드에서 읽어 {chat_id: [메시지...]} 로 반환
+
+        읽는 동안에는 flush 를 막아 (쓰는 중인 세그먼트나 지워지는 채팅을 읽지 않도록) 새 기록은 메모리에 모아 둠
+        """
+        async with self._get_lock():
+            return await asyncio.to_thread(self._read_all)
@@ -1,13 +1,27 @@
 import os
-import openai
 import json
-from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import re
 
-# 🔐 환경변수 로드
-load_dotenv()
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# openai 는 import 가 무거우므로 첫 호출 때 클라이언트와 함께 만든다
+_client = None
+
+def get_client():
+    global _client
+    if _client is None:
+        import openai
+        from dotenv import load_dotenv
+
+        # 🔐 환경변수 로드
+        load_dotenv()
+        # 기본 타임아웃(600초)이면 멈춘 호출이 GPT 작업 큐의 자리를 오래 잡고 있으므로
+        # 재시도 1회를 포함해도 작업 마감(GPT_DEADLINE_SECONDS, 기본 60초) 안에 끝나도록 설정
+        _client = openai.OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=float(os.getenv("OPENAI_TIMEOUT_SECONDS", "25")),
+            max_retries=1,
+        )
+    return _client
 
 def get_next_weekday(current_date: datetime, target_weekday: int) -> datetime:
     """주어진 날짜의 다음 특정 요일 날짜를 반환"""
@@ -129,7 +143,7 @@ def analyze_dialogue(dialogue_texts: list[str], base_date: datetime = None, mode
         prompt += f"{i}. {text}\n"
 
     try:
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model=model_name,
             messages=[
                 {"role": "system", "content": "너는 JSON 응답 전문가야. 어떤 상황에서도 반드시 순수한 JSON 형식으로만 응답해야 하며, 다른 설명이나 텍스트는 절대 포함하지 마. 분석 결과는 available_times와 locations 키를 가진 JSON 객체로만 반환해야 해. 무의미한 대화는 무시하고, 시간을 언급한 참여자들 중 가장 많은 사람이 가능한 시간을 찾아내야 해."},
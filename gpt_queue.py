@@ -0,0 +1,200 @@
+import asyncio
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from gpt import analyze_dialogue
+
+
+class GPTRequestExpired(Exception):
+    """마감 시간이 지났거나 같은 채팅의 새 요청에 밀려 취소된 분석 요청"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason  # "deadline" 또는 "superseded"
+
+
+class _Job:
+    __slots__ = ("key", "args", "kwargs", "future", "enqueued_at", "deadline", "timer", "background")
+
+    def __init__(self, key, args, kwargs, future, enqueued_at, deadline, background=False):
+        self.key = key
+        self.background = background
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.enqueued_at = enqueued_at
+        self.deadline = deadline
+        self.timer = None
+
+
+class GPTScheduler:
+    """analyze_dialogue 앞단의 작업 큐
+
+    - 전체 동시 호출 수를 max_concurrency 로 제한
+    - 채팅(key)별 큐를 라운드로빈으로 돌면서 한 채팅이 다른 채팅을 굶기지 않도록 함
+    - 요청마다 마감 시간을 두고, 지난 요청은 실행하지 않거나 결과를 버림
+    - background 작업(미리 분석 등)은 대기 중인 일반 작업이 없을 때만, 최대 max_background 개까지 실행
+    """
+
+    def __init__(self, func=analyze_dialogue, max_concurrency: int = 4,
+                 max_pending_per_chat: int = 2, default_deadline: float = 60.0, max_background: int = None):
+        self.func = func
+        self.max_concurrency = max_concurrency
+        # 일반 요청용 자리를 항상 남겨 둠
+        self.max_background = max_background if max_background is not None else max(1, max_concurrency // 2)
+        self.max_pending_per_chat = max_pending_per_chat
+        self.default_deadline = default_deadline
+
+        self._queues = {}       # key -> deque[_Job]
+        self._ready = deque()   # 대기 중인 작업이 있는 key 의 라운드로빈 순서
+        self._idle_ready = deque()  # background 작업용 라운드로빈 순서
+        self._wakeup = None
+        self._workers = []
+        # GPT 호출 전용 스레드 풀. 기본 실행기(asyncio.to_thread)는 로그 기록·장소 검색과 함께 쓰므로
+        # 느린 GPT 호출이 그쪽 스레드까지 잡아먹지 않도록 분리
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="gpt")
+
+        self.running = 0
+        self.running_background = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.expired = 0
+        self.superseded = 0
+        self._waits = deque(maxlen=500)  # 최근 대기 시간(초)
+
+    def _ensure_workers(self):
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)]
+
+    async def submit(self, key, *args, deadline: float = None, background: bool = False, **kwargs):
+        """작업을 큐에 넣고 결과를 기다린다. 마감을 넘기면 GPTRequestExpired
+
+        background=True 면 낮은 우선순위로 실행 (같은 key 는 항상 같은 우선순위로 제출해야 함)
+        """
+        self._ensure_workers()
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        job = _Job(key, args, kwargs, loop.create_future(), now,
+                   now + (deadline if deadline is not None else self.default_deadline), background)
+        job.timer = loop.call_at(job.deadline, self._expire, job, "deadline")
+
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+            (self._idle_ready if background else self._ready).append(key)
+        # 같은 채팅에서 밀린 오래된 요청은 새 요청이 대신하므로 버린다
+        while len(queue) >= self.max_pending_per_chat:
+            self._expire(queue.popleft(), "superseded")
+        queue.append(job)
+        self.submitted += 1
+        self._wakeup.set()
+
+        try:
+            return await job.future
+        finally:
+            job.timer.cancel()
+
+    def promote(self, key):
+        """대기 중인 background key 를 일반 우선순위로 올림 (사용자가 그 결과를 기다릴 때)"""
+        try:
+            self._idle_ready.remove(key)
+        except ValueError:
+            return
+        for job in self._queues.get(key, ()):
+            job.background = False
+        self._ready.append(key)
+        self._wakeup.set()
+
+    def _expire(self, job: _Job, reason: str):
+        if job.future.done():
+            return
+        job.future.set_exception(GPTRequestExpired(reason))
+        if reason == "superseded":
+            self.superseded += 1
+        else:
+            self.expired += 1
+
+    def _pick(self):
+        # 일반 작업 우선, background 는 일반 작업이 없고 자리가 남을 때만
+        if self._ready:
+            return self._ready
+        if self._idle_ready and self.running_background < self.max_background:
+            return self._idle_ready
+        return None
+
+    async def _next_job(self) -> _Job:
+        while True:
+            ready = self._pick()
+            while ready is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                ready = self._pick()
+            key = ready.popleft()
+            queue = self._queues[key]
+            job = queue.popleft()
+            if queue:
+                ready.append(key)
+            else:
+                del self._queues[key]
+            # 기다리는 동안 마감되었거나 호출자가 포기한 작업은 건너뜀
+            if not job.future.done():
+                return job
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._next_job()
+            self._waits.append(loop.time() - job.enqueued_at)
+            self.running += 1
+            if job.background:
+                self.running_background += 1
+            try:
+                # 마감이 지나도 스레드는 끝까지 기다려야 동시 호출 수 제한이 지켜진다
+                call = functools.partial(self.func, *job.args, **job.kwargs)
+                result = await loop.run_in_executor(self._executor, call)
+            except Exception as e:
+                self.failed += 1
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                self.completed += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self.running -= 1
+                if job.background:
+                    self.running_background -= 1
+                    # background 자리가 비었으니 기다리던 worker 를 깨움
+                    self._wakeup.set()
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "queue_depth": sum(1 for q in self._queues.values() for job in q if not job.future.done()),
+            "waiting_chats": len(self._queues),
+            "running": self.running,
+            "running_background": self.running_background,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "expired": self.expired,
+            "superseded": self.superseded,
+            "wait_avg": sum(waits) / len(waits) if waits else 0.0,
+            "wait_p95": waits[int(len(waits) * 0.95)] if waits else 0.0,
+            "wait_max": waits[-1] if waits else 0.0,
+        }
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        return (
+            f"🧠 GPT 작업 큐\n"
+            f"- 대기: {s['queue_depth']}건 ({s['waiting_chats']}개 채팅)\n"
+            f"- 실행 중: {s['running']}/{self.max_concurrency} (미리 분석 {s['running_background']})\n"
+            f"- 완료/실패: {s['completed']}/{s['failed']}\n"
+            f"- 마감 초과/대체됨: {s['expired']}/{s['superseded']}\n"
+            f"- 대기 시간: 평균 {s['wait_avg']:.2f}s, p95 {s['wait_p95']:.2f}s, 최대 {s['wait_max']:.2f}s"
+        )
@@ -0,0 +1,212 @@
+import os
+import re
+import time
+import zlib
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+LABELS = ["+", "-", "0"]
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_data.tsv")
+N_FEATURES = 1 << 13
+
+# 바로 뒤 표현을 부정하는 말 ('안 돼', '못 가', '안될', '가지 않아' 등)
+# 안/못 은 따로 띄어 쓰였거나 동사 앞에 붙었을 때만 ('안녕', '안내', '안전', '못생긴' 은 제외)
+# '없' 은 '시간 없어'(-) / '일정 없어'(+) 처럼 앞 단어에 따라 뜻이 바뀌므로 부정어로 보지 않고 단어 쌍 특징으로 학습
+NEGATION = re.compile(r"(?:^|\s)(안|못)(?=\s|돼|되|될|됨|됐|가|갈|와|올|괜찮|좋|만나|만날|봐|볼|해|할|하)|않|말고|ㄴㄴ")
+
+
+_hash_cache = {}
+
+
+def _hash(feature: str) -> int:
+    idx = _hash_cache.get(feature)
+    if idx is None:
+        if len(_hash_cache) > 500000:
+            _hash_cache.clear()
+        idx = _hash_cache[feature] = zlib.crc32(feature.encode("utf-8")) % N_FEATURES
+    return idx
+
+
+@lru_cache(maxsize=65536)
+def features(text: str) -> tuple:
+    """문자 1~3-gram + 단어 + 단어 쌍 + 부정 표시 특징의 해시 인덱스
+
+    '안돼'의 '돼'가 긍정 단어로 잡히지 않도록, 부정어 뒤의 단어에는 '!' 를 붙인
+    별도 특징을 만들고 부정어가 있다는 특징도 따로 넣는다.
+    """
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    padded = f" {text} "
+    feats = [f"c{n}:{padded[i:i + n]}" for n in (1, 2, 3) for i in range(len(padded) - n + 1)]
+
+    negated = False
+    prev = "^"
+    for word in text.split(" "):
+        if negated or NEGATION.search(" " + word):
+            feats.append(f"w:!{word}")
+        else:
+            feats.append(f"w:{word}")
+        # 단어 쌍 ('시간 없어' 와 '일정 없어' 구분)
+        feats.append(f"b:{prev}_{word}")
+        negated = word in ("안", "못")
+        prev = word
+    if NEGATION.search(text):
+        feats.append("neg")
+    return tuple(map(_hash, feats))
+
+
+def sparse_features(texts: List[str]):
+    """문장 목록 → (행, 열, 값) 희소 표현. 행 순서로 정렬되고 행마다 L2 정규화됨"""
+    rows, cols = [], []
+    for i, text in enumerate(texts):
+        idx = features(text)
+        rows.extend([i] * len(idx))
+        cols.extend(idx)
+    keys, counts = np.unique(np.array(rows, dtype=np.int64) * N_FEATURES + np.array(cols, dtype=np.int64),
+                             return_counts=True)
+    rows, cols = keys // N_FEATURES, keys % N_FEATURES
+    vals = counts.astype(np.float32)
+    norms = np.sqrt(np.bincount(rows, weights=vals * vals, minlength=len(texts)))
+    return rows, cols, vals / norms[rows].astype(np.float32)
+
+
+def vectorize(texts: List[str]) -> np.ndarray:
+    """문장 목록 → (문장 수, N_FEATURES) 밀집 행렬 (학습용)"""
+    rows, cols, vals = sparse_features(texts)
+    X = np.zeros((len(texts), N_FEATURES), dtype=np.float32)
+    X[rows, cols] = vals
+    return X
+
+
+def load_dataset(path: str = DATA_PATH):
+    texts, labels = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            label, text = line.rstrip("\n").split("\t", 1)
+            texts.append(text)
+            labels.append(LABELS.index(label))
+    return texts, np.array(labels)
+
+
+class IntentClassifier:
+    """문자 n-gram 특징 위의 다항 로지스틱 회귀 (NumPy)"""
+
+    def __init__(self, l2: float = 1e-4, lr: float = 8.0, epochs: int = 300):
+        self.l2 = l2
+        self.lr = lr
+        self.epochs = epochs
+        self.W = None
+        self.b = None
+
+    def fit(self, texts: List[str], labels: np.ndarray):
+        # 학습 데이터에 실제로 나온 특징 열만 모아 학습 (나머지 가중치는 0)
+        X = vectorize(texts)
+        used = np.flatnonzero(X.any(axis=0))
+        X = np.ascontiguousarray(X[:, used])
+        Y = np.eye(len(LABELS), dtype=np.float32)[labels]
+        W = np.zeros((len(used), len(LABELS)), dtype=np.float32)
+        b = np.zeros(len(LABELS), dtype=np.float32)
+        n = len(texts)
+        for _ in range(self.epochs):
+            P = self._softmax(X @ W + b)
+            G = (P - Y) / n
+            W -= self.lr * (X.T @ G + self.l2 * W)
+            b -= self.lr * G.sum(axis=0)
+        self.W = np.zeros((N_FEATURES, len(LABELS)), dtype=np.float32)
+        self.W[used] = W
+        self.b = b
+        return self
+
+    @staticmethod
+    def _softmax(Z: np.ndarray) -> np.ndarray:
+        Z = Z - Z.max(axis=1, keepdims=True)
+        E = np.exp(Z)
+        return E / E.sum(axis=1, keepdims=True)
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, len(LABELS)), dtype=np.float32)
+        # 밀집 행렬을 만들지 않고 문장별로 해당 가중치 행만 모아 더함
+        rows, cols, vals = sparse_features(texts)
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        scores = np.add.reduceat(self.W[cols] * vals[:, None], starts, axis=0)
+        return self._softmax(scores + self.b)
+
+    def predict(self, texts: List[str]) -> List[str]:
+        """대화 전체를 한 번에 분류해 '+', '-', '0' 목록으로 반환"""
+        return [LABELS[i] for i in self.predict_proba(texts).argmax(axis=1)]
+
+
+_default = None
+
+
+def default_classifier() -> IntentClassifier:
+    """함께 들어 있는 intent_data.tsv 로 학습한 분류기 (처음 호출 시 한 번만 학습)"""
+    global _default
+    if _default is None:
+        _default = IntentClassifier().fit(*load_dataset())
+    return _default
+
+
+if __name__ == "__main__":
+    from model import keyword_intent_model
+
+    texts, labels = load_dataset()
+    # 5-fold 교차 검증: 모든 문장을 한 번씩 평가 (fold 마다 라벨 비율이 비슷하도록 라벨별로 나눔)
+    rng = np.random.default_rng(0)
+    folds = np.zeros(len(texts), dtype=int)
+    for label in range(len(LABELS)):
+        idx = rng.permutation(np.flatnonzero(labels == label))
+        folds[idx] = np.arange(len(idx)) % 5
+    preds = [None] * len(texts)
+    for k in range(5):
+        train, test = np.flatnonzero(folds != k), np.flatnonzero(folds == k)
+        fold_clf = IntentClassifier().fit([texts[i] for i in train], labels[train])
+        for i, p in zip(test, fold_clf.predict([texts[i] for i in test])):
+            preds[i] = p
+    gold = [LABELS[i] for i in labels]
+
+    def report(name, predicted):
+        total = sum(p == g for p, g in zip(predicted, gold)) / len(gold)
+        per_class = []
+        for label in LABELS:
+            idx = [i for i, g in enumerate(gold) if g == label]
+            per_class.append(f"{label} {sum(predicted[i] == label for i in idx) / len(idx):.0%} ({len(idx)})")
+        print(f"정확도 (5-fold, {len(gold)}문장) - {name}: {total:.2%} | " + ", ".join(per_class))
+
+    report("키워드", keyword_intent_model(texts))
+    report("분류기", preds)
+
+    # 학습 데이터 자체를 맞히는지 (못 맞히면 특징이 두 라벨을 구분하지 못한다는 뜻)
+    clf = default_classifier()
+    misfit = [(t, LABELS[g], p) for t, g, p in zip(texts, labels, clf.predict(texts)) if LABELS[g] != p]
+    print(f"학습 데이터 적합: {len(texts) - len(misfit)}/{len(texts)}")
+    for text, expected, got in misfit:
+        print(f"❌ {text!r} → {got} (라벨 {expected})")
+
+    # 요일 + 거절 표현처럼 헷갈리기 쉬운 문장 (학습 데이터와 다른 표현)
+    probes = {"나 금요일에 바쁨": "-", "토요일엔 출장 잡혀 있어": "-", "수요일 야근 확정": "-",
+              "목요일은 일정이 있어서": "-", "다 상관없어": "+", "목요일 한가함": "+",
+              "안녕": "0", "안내해줄게": "0", "안전하게 가": "0", "안부 전해줘": "0",
+              "나 시간 없어": "-", "난 일정 없어": "+"}
+    for text, (expected, got) in zip(probes, zip(probes.values(), clf.predict(list(probes)))):
+        print(f"{'✅' if got == expected else '❌'} {text!r} → {got} (기대값 {expected})")
+
+    # warm: 같은 문장 반복(특징 캐시 적중), cold: 모두 다른 문장
+    warm = texts * 50
+    cold = [f"{t} {i}" for i, t in enumerate(warm)]
+    for name, func in (("키워드", keyword_intent_model), ("분류기", clf.predict)):
+        for kind, batch in (("cold", cold), ("warm", warm)):
+            features.cache_clear()
+            if kind == "warm":
+                func(batch)
+            start = time.perf_counter()
+            func(batch)
+            elapsed = time.perf_counter() - start
+            print(f"처리량 - {name} ({kind}): {len(batch) / elapsed:,.0f} 문장/초 ({len(batch)}문장, {elapsed * 1000:.1f}ms)")
+
+    # 학습 데이터를 못 맞히면 실패로 종료 (데이터/특징을 바꾼 뒤 확인용)
+    raise SystemExit(1 if misfit else 0)
@@ -1,17 +1,18 @@
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import os
-import openai
-
-load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
-
-print("✅ API 키:", openai.api_key)
-
 
 from fastapi import FastAPI
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # openai 설정은 import 시점이 아니라 서버 시작 시 한 번만
+    load_dotenv()
+    print("✅ API 키:", "설정됨" if os.getenv("OPENAI_API_KEY") else "없음")
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/")
 def root():
-    return {"message": "GO!비서 FastAPI 백엔드"}
\ No newline at end of file
+    return {"message": "GO!비서 FastAPI 백엔드"}
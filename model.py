@@ -1,10 +1,5 @@
 from typing import List, Tuple
-import openai
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
 
 # 간단한 룰 기반 NER (키워드 기반)
 def ner_model(input_list: List[str]) -> List[List[Tuple[str, str]]]:
@@ -46,8 +41,14 @@ def ner_model(input_list: List[str]) -> List[List[Tuple[str, str]]]:
         result.append(ner_result)
     return result
 
-# intent 추출 모델
+# intent 추출 모델 (intent_data.tsv 로 학습한 문자 n-gram 분류기)
 def intent_model(input_list: List[str]) -> List[str]:
+    # numpy 를 쓰는 분류기는 처음 필요할 때 불러옴
+    from intent_classifier import default_classifier
+    return default_classifier().predict(list(input_list))
+
+# 기존 키워드 기반 intent 추출 (비교/벤치마크용)
+def keyword_intent_model(input_list: List[str]) -> List[str]:
     result = []
     for text in input_list:
         if any(word in text for word in [
@@ -77,6 +78,10 @@ def postprocess_NER(preds: List[List[Tuple[str, str]]]) -> List[List[Tuple[str,
 
 # GPT 장소 추출 함수
 def gpt_place_extraction(texts):
+    import openai
+    from dotenv import load_dotenv
+
+    load_dotenv()
     openai.api_key = os.getenv("OPENAI_API_KEY")
     full_context = "\n".join(texts)
 
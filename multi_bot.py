@@ -0,0 +1,70 @@
+import asyncio
+import os
+import signal
+
+from telegram_bot import BotState, build_app
+
+
+def parse_tokens(value: str) -> dict:
+    """TELEGRAM_TOKENS="이름=토큰,이름=토큰" → {이름: 토큰}
+
+    이름을 생략하면 토큰 앞부분의 봇 id 를 이름으로 사용
+    """
+    tokens = {}
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, token = entry.rpartition("=")
+        if not name:
+            name = token.split(":", 1)[0]
+        tokens[name] = token
+    return tokens
+
+
+async def run(tokens: dict):
+    """여러 봇을 한 이벤트 루프에서 실행
+
+    대화/약속/발송 큐는 봇마다 따로 두고, GPT 작업 큐·OpenAI/네이버 연결·장소 색인은 함께 사용
+    """
+    apps = [build_app(token, BotState(name)) for name, token in tokens.items()]
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    initialized = []
+    try:
+        for app in apps:
+            await app.initialize()
+            initialized.append(app)
+            await app.post_init(app)
+            # PTB 의 수동 시작 순서: Application.start() 다음에 폴링 시작
+            await app.start()
+            await app.updater.start_polling(drop_pending_updates=True)
+            print(f"🤖 [{app.bot_data['state'].name}] @{app.bot.username} 실행 중")
+        await stop.wait()
+    finally:
+        # run_polling 과 같은 순서로 종료
+        for app in reversed(initialized):
+            if app.updater.running:
+                await app.updater.stop()
+            if app.running:
+                await app.stop()
+                await app.post_stop(app)
+            await app.shutdown()
+            await app.post_shutdown(app)
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    # .env 파일 로드
+    load_dotenv()
+    tokens = parse_tokens(os.getenv("TELEGRAM_TOKENS", ""))
+    if not tokens:
+        raise SystemExit("TELEGRAM_TOKENS 환경변수에 '이름=토큰,이름=토큰' 형식으로 봇 토큰을 지정하세요.")
+    print(f"GO!비서 {len(tokens)}개 봇 실행 중...")
+    asyncio.run(run(tokens))
@@ -1,30 +1,78 @@
 import os
-import requests
-from dotenv import load_dotenv
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-# 🔐 환경변수 로드
-load_dotenv()
+# requests 세션과 장소 색인은 처음 쓸 때 만든다 (import 를 가볍게 유지)
+_session = None
+_place_index = None
+_init_lock = threading.Lock()
+_refresher = ThreadPoolExecutor(max_workers=1)
 
-# ✅ .env에서 인증 정보 가져오기
-CLIENT_ID = os.getenv("NAVER_CLIENT_ID")
-CLIENT_SECRET = os.getenv("NAVER_CLIENT_SECRET")
+def get_session():
+    """연결을 재사용하도록 모든 호출(여러 봇 포함)이 공유하는 세션"""
+    global _session
+    with _init_lock:
+        if _session is None:
+            import requests
+            from dotenv import load_dotenv
 
-headers = {
-    "X-Naver-Client-Id": CLIENT_ID,
-    "X-Naver-Client-Secret": CLIENT_SECRET
-}
+            # 🔐 환경변수 로드 후 ✅ .env에서 인증 정보 가져오기
+            load_dotenv()
+            _session = requests.Session()
+            _session.headers.update({
+                "X-Naver-Client-Id": os.getenv("NAVER_CLIENT_ID"),
+                "X-Naver-Client-Secret": os.getenv("NAVER_CLIENT_SECRET")
+            })
+    return _session
 
-def search_places(keyword, display=3):
-    """네이버 로컬 검색 API"""
+def get_place_index():
+    """한 번 본 장소를 쌓아 두고 재사용하는 로컬 색인"""
+    global _place_index
+    with _init_lock:
+        if _place_index is None:
+            from place_index import PlaceIndex
+            _place_index = PlaceIndex()
+    return _place_index
+
+def search_places(keyword, display=3, category=None):
+    """네이버 로컬 검색 API (결과는 place_index 에도 기록)
+
+    category 를 주면 '맛집' 대신 그 업종으로 검색 (예: '카페')
+    """
     url = "https://openapi.naver.com/v1/search/local.json"
     params = {
-        "query": keyword + ' 맛집',
+        "query": f"{keyword} {category or '맛집'}",
         "display": display,
         "start": 1,
         "sort": "random"
     }
-    response = requests.get(url, headers=headers, params=params)
-    return response.json().get('items', []) if response.status_code == 200 else []
+    response = get_session().get(url, params=params)
+    items = response.json().get('items', []) if response.status_code == 200 else []
+    if items:
+        # 업종 검색은 '키워드 업종' 을 검색어로 기록
+        get_place_index().add(items, query=f"{keyword} {category}" if category else keyword)
+    return items
+
+def _refresh(keyword, display, category):
+    try:
+        search_places(keyword, display, category)
+    except Exception as e:
+        print("❌ 장소 색인 갱신 실패:", e)
+
+def find_places(keyword, display=3, category=None):
+    """로컬 색인에서 먼저 찾고, 부족할 때만 API 호출
+
+    같은 검색어로 API 를 부른 적이 없으면 주소가 키워드와 맞는 장소만 사용 (다른 동네 장소 방지)
+    색인 결과가 오래되었으면 응답은 색인으로 바로 하고 API 갱신은 뒤에서 진행
+    """
+    index = get_place_index()
+    query = f"{keyword} {category}" if category else keyword
+    places = index.search(keyword, category, limit=display, area_only=not index.has_query(query))
+    if len(places) < display:
+        return search_places(keyword, display, category) or places
+    if index.is_stale(query):
+        _refresher.submit(_refresh, keyword, display, category)
+    return places
 
 def search_image(keyword):
     """네이버 이미지 검색 API"""
@@ -34,7 +82,7 @@ def search_image(keyword):
         "display": 1,
         "sort": "sim"
     }
-    response = requests.get(url, headers=headers, params=params)
+    response = get_session().get(url, params=params)
     items = response.json().get('items', [])
     return items[0]['link'] if items else None
 
@@ -46,7 +94,7 @@ def get_blog_snippet(keyword):
         "display": 1,
         "sort": "sim"
     }
-    response = requests.get(url, headers=headers, params=params)
+    response = get_session().get(url, params=params)
     items = response.json().get('items', [])
     return items[0]['description'].replace('<b>', '').replace('</b>', '') if items else "리뷰 정보 없음"
 
@@ -57,7 +105,10 @@ def format_places_for_message(places):
         title = place['title'].replace('<b>', '').replace('</b>', '')
         address = place['roadAddress'] or place['address']
         link = place['link']
-        lines.append(f"{idx}. {title}\n   - 📌 {address}\n   - 🔗 {link}")
+        line = f"{idx}. {title}\n   - 📌 {address}\n   - 🔗 {link}"
+        if 'distance' in place:
+            line += f"\n   - 🚶 만남 지점에서 약 {place['distance'] * 1000:.0f}m"
+        lines.append(line)
     return "\n".join(lines)
 
 def print_cards(places):
@@ -0,0 +1,164 @@
+import json
+import os
+import re
+import threading
+import time
+
+FIELDS = ("title", "address", "roadAddress", "category", "mapx", "mapy", "link")
+
+
+def clean_title(title: str) -> str:
+    return title.replace('<b>', '').replace('</b>', '')
+
+
+def tokenize(text: str) -> set:
+    """단어 + 한글 단어의 2글자 조각 ('홍대입구역' → 홍대, 대입, 입구, 구역)
+
+    조사가 붙거나 띄어쓰기가 달라도 부분 일치로 찾을 수 있도록 한다.
+    """
+    tokens = set()
+    for word in re.findall(r"\w+", text.lower()):
+        tokens.add(word)
+        if len(word) > 2 and re.search(r"[가-힣]", word):
+            tokens.update(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def _query_grams(word: str) -> set:
+    if len(word) > 2 and re.search(r"[가-힣]", word):
+        return {word[i:i + 2] for i in range(len(word) - 1)}
+    return {word}
+
+
+class PlaceIndex:
+    """네이버 지역 검색 결과를 쌓아 두는 디스크 기반 역색인
+
+    - 제목/주소/도로명주소/카테고리를 토큰으로 나눠 색인
+    - 검색어별로 어떤 장소가 나왔는지도 기억해 같은 검색어는 API 없이 응답
+    - 변경 사항은 save_delay 초 뒤에 한꺼번에 place_index.json 으로 저장
+    """
+
+    def __init__(self, path: str = "place_index.json", max_age: float = 24 * 3600, save_delay: float = 5.0):
+        self.path = path
+        self.max_age = max_age
+        self.save_delay = save_delay
+
+        self.docs = {}       # doc_id -> 장소 정보
+        self.queries = {}    # 검색어 -> {"ids": [...], "at": 갱신 시각}
+        self._postings = {}  # 토큰 -> doc_id 집합
+        self._categories = {}  # 카테고리 토큰 -> doc_id 집합
+        self._areas = {}     # 주소/도로명주소 토큰 -> doc_id 집합
+        self.version = 0     # 내용이 바뀔 때마다 증가 (공간 색인 재생성 판단용)
+        self._lock = threading.Lock()
+        self._save_timer = None
+        self.load()
+
+    @staticmethod
+    def _doc_id(item: dict) -> str:
+        return f"{clean_title(item['title'])}|{item.get('roadAddress') or item.get('address', '')}"
+
+    def _index_doc(self, doc_id: str, doc: dict):
+        text = " ".join((doc["title"], doc.get("address", ""), doc.get("roadAddress", ""), doc.get("category", "")))
+        for token in tokenize(text):
+            self._postings.setdefault(token, set()).add(doc_id)
+        for token in tokenize(doc.get("category", "")):
+            self._categories.setdefault(token, set()).add(doc_id)
+        for token in tokenize(" ".join((doc.get("address", ""), doc.get("roadAddress", "")))):
+            self._areas.setdefault(token, set()).add(doc_id)
+
+    def add(self, items: list, query: str = None):
+        """API 결과를 색인에 추가. query 를 주면 검색어 → 결과 목록도 기록"""
+        with self._lock:
+            ids = []
+            for item in items:
+                doc = {k: item.get(k, "") for k in FIELDS}
+                doc["title"] = clean_title(doc["title"])
+                doc_id = self._doc_id(item)
+                self.docs[doc_id] = doc
+                self._index_doc(doc_id, doc)
+                ids.append(doc_id)
+            if query is not None:
+                self.queries[query.strip()] = {"ids": ids, "at": time.time()}
+            self.version += 1
+        self._schedule_save()
+
+    def _match(self, text: str, postings: dict):
+        matched = None
+        for word in re.findall(r"\w+", text.lower()):
+            for gram in _query_grams(word):
+                ids = postings.get(gram, set())
+                matched = set(ids) if matched is None else matched & ids
+                if not matched:
+                    return set()
+        return matched or set()
+
+    def _words(self, doc_id: str) -> set:
+        doc = self.docs[doc_id]
+        return set(re.findall(r"\w+", f"{doc['title']} {doc.get('roadAddress', '')} {doc.get('address', '')}".lower()))
+
+    def has_query(self, keyword: str) -> bool:
+        return keyword.strip() in self.queries
+
+    def search(self, keyword: str, category: str = None, limit: int = 3, area_only: bool = False) -> list:
+        """키워드(및 카테고리)로 색인된 장소를 찾는다. 결과는 API 응답과 같은 형식
+
+        area_only 면 키워드를 주소/도로명주소에서만 찾음 ('강남' 이 '강남면옥 신촌점' 에 걸리지 않도록)
+        """
+        keyword = keyword.strip()
+        with self._lock:
+            # 업종 검색 결과('키워드 업종')가 있으면 그것을, 없으면 키워드 검색 결과를 먼저
+            entry = self.queries.get(f"{keyword} {category.strip()}" if category else keyword)
+            ordered = list((entry or self.queries.get(keyword, {})).get("ids", []))
+            seen = set(ordered)
+            # 같은 검색어 결과 다음으로, 단어가 통째로 들어 있는 장소를 우선
+            words = set(re.findall(r"\w+", keyword.lower()))
+            extra = self._match(keyword, self._areas if area_only else self._postings) - seen
+            ordered += sorted(extra, key=lambda d: (-len(words & self._words(d)), d))
+            if category:
+                allowed = self._match(category, self._categories)
+                ordered = [d for d in ordered if d in allowed]
+            return [dict(self.docs[d]) for d in ordered[:limit] if d in self.docs]
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [dict(doc) for doc in self.docs.values()]
+
+    def is_stale(self, keyword: str) -> bool:
+        entry = self.queries.get(keyword.strip())
+        return entry is None or time.time() - entry["at"] > self.max_age
+
+    def _schedule_save(self):
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.save_delay, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def save(self):
+        with self._lock:
+            self._save_timer = None
+            data = json.dumps({"docs": self.docs, "queries": self.queries}, ensure_ascii=False)
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print("❌ 장소 색인 저장 실패:", e)
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        with self._lock:
+            self.docs = data.get("docs", {})
+            self.queries = data.get("queries", {})
+            self._postings = {}
+            self._categories = {}
+            self._areas = {}
+            for doc_id, doc in self.docs.items():
+                self._index_doc(doc_id, doc)
+            self.version += 1
@@ -0,0 +1,219 @@
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+
+from telegram import ReplyParameters
+from telegram.error import RetryAfter
+
+MAX_MESSAGE_LENGTH = 4096
+
+
+class _ChatState:
+    __slots__ = ("queue", "next_allowed", "sending")
+
+    def __init__(self):
+        self.queue = deque()      # (text, future, enqueued_at, reply_to)
+        self.next_allowed = 0.0
+        self.sending = False
+
+
+class Outbox:
+    """텔레그램 발송 큐
+
+    - 채팅별 최소 간격(개인 1초, 그룹 3초)과 봇 전체 초당 발송 수를 지켜 전송
+    - RetryAfter 를 받으면 그 시간만큼 쉬었다가 같은 메시지를 다시 보냄
+    - 같은 채팅으로 연달아 쌓인 메시지는 한 번에 합쳐서 보냄
+      (hold() 블록 안에서 보낸 메시지는 블록이 끝날 때까지, 최대 max_hold 초 모아서 보냄)
+    """
+
+    def __init__(self, private_interval: float = 1.0, group_interval: float = 3.0,
+                 global_rate: float = 25.0, merge_window: float = 0.3, max_hold: float = 10.0):
+        self.private_interval = private_interval
+        self.group_interval = group_interval
+        self.global_interval = 1.0 / global_rate
+        self.merge_window = merge_window
+        self.max_hold = max_hold
+
+        self._chats = {}          # (bot, chat_id) -> _ChatState
+        self._global_next = 0.0
+        self._wakeup = None
+        self._dispatcher = None
+        self._holds = {}          # (bot, chat_id) -> 진행 중인 hold() 수
+        self._deliveries = set()  # 진행 중인 전송 작업 (참조를 유지해야 중간에 사라지지 않음)
+
+        self.sent = 0
+        self.merged = 0
+        self.failed = 0
+        self.retry_after = 0
+        self._latencies = deque(maxlen=500)   # 큐에 넣은 뒤 전송 완료까지(초)
+        self._api_times = deque(maxlen=500)   # send_message 호출 시간(초)
+
+    def send(self, bot, chat_id, text: str, reply_to: int = None) -> asyncio.Future:
+        """메시지를 큐에 넣는다. 반환된 Future 는 전송 성공 여부(bool)로 완료됨
+
+        reply_to 를 주면 그 메시지에 답장으로 보냄 (합쳐진 메시지들의 reply_to 가 모두 같을 때만)
+        """
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None:
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        future = loop.create_future()
+        state = self._chats.get((bot, chat_id))
+        if state is None:
+            state = self._chats[(bot, chat_id)] = _ChatState()
+        state.queue.append((text, future, loop.time(), reply_to))
+        self._wakeup.set()
+        return future
+
+    @contextmanager
+    def hold(self, bot, chat_id):
+        """블록 안에서 이 채팅으로 보낸 메시지를 블록이 끝난 뒤 한 번에 합쳐 보냄
+
+        핸들러가 응답 사이에 API 호출 등으로 오래 기다려도 응답이 따로 나가지 않도록 사용
+        """
+        key = (bot, chat_id)
+        self._holds[key] = self._holds.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            self._holds[key] -= 1
+            if not self._holds[key]:
+                del self._holds[key]
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    def _interval(self, chat_id) -> float:
+        # 그룹/채널 id 는 음수
+        return self.group_interval if int(chat_id) < 0 else self.private_interval
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            wait = None
+            for key in list(self._chats):
+                state = self._chats[key]
+                if state.sending:
+                    continue
+                if not state.queue:
+                    # 최소 간격이 지난 뒤에만 상태를 지워야 다음 메시지도 간격을 지킴
+                    if state.next_allowed <= now:
+                        del self._chats[key]
+                    continue
+                ready_at = max(state.next_allowed, state.queue[0][2] + self.merge_window, self._global_next)
+                if key in self._holds:
+                    ready_at = max(ready_at, state.queue[0][2] + self.max_hold)
+                if ready_at > now:
+                    wait = ready_at - now if wait is None else min(wait, ready_at - now)
+                    continue
+                state.sending = True
+                self._global_next = now + self.global_interval
+                # 라운드로빈: 방금 보낸 채팅은 뒤로
+                del self._chats[key]
+                self._chats[key] = state
+                task = asyncio.create_task(self._deliver(key, state, self._take_batch(state)))
+                self._deliveries.add(task)
+                task.add_done_callback(self._deliveries.discard)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _take_batch(self, state: _ChatState) -> list:
+        batch = [state.queue.popleft()]
+        length = len(batch[0][0])
+        while state.queue and length + 2 + len(state.queue[0][0]) <= MAX_MESSAGE_LENGTH:
+            item = state.queue.popleft()
+            length += 2 + len(item[0])
+            batch.append(item)
+        self.merged += len(batch) - 1
+        return batch
+
+    async def _deliver(self, key, state: _ChatState, batch: list):
+        loop = asyncio.get_running_loop()
+        bot, chat_id = key
+        text = "\n\n".join(item[0] for item in batch)
+        reply_to = {item[3] for item in batch}
+        reply_parameters = None
+        if len(reply_to) == 1 and None not in reply_to:
+            # 원본 메시지가 지워졌어도 답장 없이 보냄
+            reply_parameters = ReplyParameters(reply_to.pop(), allow_sending_without_reply=True)
+        ok = False
+        try:
+            while True:
+                started = loop.time()
+                try:
+                    await bot.send_message(chat_id=chat_id, text=text, reply_parameters=reply_parameters)
+                except RetryAfter as e:
+                    self.retry_after += 1
+                    delay = e.retry_after
+                    if hasattr(delay, "total_seconds"):
+                        delay = delay.total_seconds()
+                    # 전체 제한에 걸린 경우도 있으므로 다른 채팅 발송도 같이 미룬다
+                    self._global_next = max(self._global_next, loop.time() + delay)
+                    await asyncio.sleep(delay)
+                    # 같은 시점에 깨어난 다른 채팅의 재시도와 겹치지 않도록 전체 발송 간격을 다시 지킴
+                    while loop.time() < self._global_next:
+                        await asyncio.sleep(self._global_next - loop.time())
+                    self._global_next = loop.time() + self.global_interval
+                    continue
+                self._api_times.append(loop.time() - started)
+                ok = True
+                break
+        except Exception as e:
+            self.failed += 1
+            print("❌ 텔레그램 메시지 전송 실패:", e)
+        finally:
+            done = loop.time()
+            if ok:
+                self.sent += 1
+            for _, future, enqueued_at, _ in batch:
+                self._latencies.append(done - enqueued_at)
+                if not future.done():
+                    future.set_result(ok)
+            state.next_allowed = done + self._interval(chat_id)
+            state.sending = False
+            self._wakeup.set()
+
+    async def drain(self, timeout: float = 10.0):
+        """큐에 남은 메시지를 (최대 timeout 초까지) 모두 보낸 뒤 발송 작업을 멈춤. 종료 직전에 호출"""
+        pending = [item[1] for s in self._chats.values() for item in s.queue] + list(self._deliveries)
+        if pending:
+            await asyncio.wait(pending, timeout=timeout)
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        for task in list(self._deliveries):
+            task.cancel()
+        for state in self._chats.values():
+            for _, future, _, _ in state.queue:
+                if not future.done():
+                    future.set_result(False)
+        self._chats.clear()
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        api_times = sorted(self._api_times)
+        return {
+            "backlog": sum(len(s.queue) for s in self._chats.values()),
+            "backlog_chats": sum(1 for s in self._chats.values() if s.queue),
+            "sent": self.sent,
+            "merged": self.merged,
+            "failed": self.failed,
+            "retry_after": self.retry_after,
+            "latency_avg": sum(latencies) / len(latencies) if latencies else 0.0,
+            "latency_p95": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+            "api_avg": sum(api_times) / len(api_times) if api_times else 0.0,
+        }
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        return (
+            f"📤 메시지 발송 큐\n"
+            f"- 대기: {s['backlog']}건 ({s['backlog_chats']}개 채팅)\n"
+            f"- 전송/실패: {s['sent']}/{s['failed']} (합쳐진 메시지 {s['merged']}건)\n"
+            f"- RetryAfter: {s['retry_after']}회\n"
+            f"- 지연: 평균 {s['latency_avg']:.2f}s, p95 {s['latency_p95']:.2f}s (API 평균 {s['api_avg']:.2f}s)"
+        )
@@ -0,0 +1,195 @@
+import math
+import re
+from collections import Counter
+
+from naver_api import get_place_index, find_places, search_places
+
+EARTH_KM = 6371.0
+REF_LAT = 37.55  # 서울 기준 위도 (경도 1도의 거리 보정용)
+
+
+def parse_coord(place: dict):
+    """네이버 mapx/mapy(WGS84 x 1e7 정수 문자열)를 (위도, 경도)로. 없거나 구형 좌표계면 None"""
+    try:
+        x, y = int(place.get("mapx") or 0), int(place.get("mapy") or 0)
+    except (TypeError, ValueError):
+        return None
+    if x < 10 ** 8 or y < 10 ** 7:
+        return None
+    return y / 1e7, x / 1e7
+
+
+def area_name(place: dict):
+    """주소에서 '구 동' 부분 ('서울 마포구 서교동 123' → '마포구 서교동'). 찾지 못하면 None"""
+    words = (place.get("address") or place.get("roadAddress") or "").split()
+    gu = next((w for w in words[1:] if re.fullmatch(r"\S+[구군시]", w)), None)
+    dong = next((w for w in words[1:] if re.fullmatch(r"\S+[동읍면]", w)), None)
+    return " ".join(w for w in (gu, dong) if w) or None
+
+
+def project(lat: float, lon: float):
+    """위경도를 평면 km 좌표로 (도시 규모에서는 충분히 정확한 등장방형 근사)"""
+    x = math.radians(lon) * EARTH_KM * math.cos(math.radians(REF_LAT))
+    y = math.radians(lat) * EARTH_KM
+    return x, y
+
+
+class KDTree:
+    """2차원 점 (x, y, 값) 목록에 대한 최근접 이웃 검색 트리"""
+
+    def __init__(self, points: list):
+        self.size = len(points)
+        self.root = self._build(list(points), 0)
+
+    def _build(self, points: list, depth: int):
+        if not points:
+            return None
+        axis = depth % 2
+        points.sort(key=lambda p: p[axis])
+        mid = len(points) // 2
+        return (points[mid], axis,
+                self._build(points[:mid], depth + 1),
+                self._build(points[mid + 1:], depth + 1))
+
+    def nearest(self, x: float, y: float, k: int = 3, max_dist: float = math.inf, accept=None) -> list:
+        """(거리, 값) 을 가까운 순으로 최대 k 개. accept 를 주면 accept(값) 이 참인 점만"""
+        best = []  # (거리^2, 값) 오름차순
+        limit = max_dist * max_dist
+
+        def visit(node):
+            nonlocal limit
+            if node is None:
+                return
+            (px, py, value), axis, left, right = node
+            d2 = (px - x) ** 2 + (py - y) ** 2
+            if d2 <= limit and (accept is None or accept(value)):
+                best.append((d2, value))
+                best.sort(key=lambda b: b[0])
+                if len(best) > k:
+                    best.pop()
+                if len(best) == k:
+                    limit = best[-1][0]
+            diff = (x if axis == 0 else y) - (px if axis == 0 else py)
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            if diff * diff <= limit:
+                visit(far)
+
+        visit(self.root)
+        return [(math.sqrt(d2), value) for d2, value in best]
+
+
+class VenueLocator:
+    """place_index 에 쌓인 장소 좌표로 만남 장소를 찾고 근처 장소를 거리순으로 추천"""
+
+    def __init__(self, index=None):
+        self._index = index
+        self._tree = None
+        self._version = None
+
+    @property
+    def index(self):
+        # 기본값은 naver_api 의 공유 색인 (처음 쓸 때 디스크에서 읽음)
+        if self._index is None:
+            self._index = get_place_index()
+        return self._index
+
+    def tree(self) -> KDTree:
+        # 색인이 바뀌었을 때만 다시 만든다
+        if self._tree is None or self._version != self.index.version:
+            self._version = self.index.version
+            points = []
+            for doc in self.index.snapshot():
+                coord = parse_coord(doc)
+                if coord:
+                    points.append((*project(*coord), doc))
+            self._tree = KDTree(points)
+        return self._tree
+
+    def geolocate(self, location: str):
+        """지명 좌표: 색인(없으면 API로 채운 색인)에서 해당 지명 장소들의 중앙값"""
+        # 검색어로 API 를 부른 적이 없으면 주소로만 찾음 ('강남' 이 '강남면옥 신촌점' 에 걸리지 않도록)
+        places = self.index.search(location, limit=10, area_only=not self.index.has_query(location))
+        if not places:
+            places = find_places(location)
+        coords = [c for c in map(parse_coord, places) if c]
+        if not coords:
+            return None
+        lats = sorted(c[0] for c in coords)
+        lons = sorted(c[1] for c in coords)
+        return lats[len(lats) // 2], lons[len(lons) // 2]
+
+    @staticmethod
+    def meeting_point(points: list, weights: list, iterations: int = 50):
+        """언급 횟수로 가중한 기하 중앙값 (Weiszfeld) - 모두의 이동 거리 합이 최소인 지점"""
+        xy = [project(*p) for p in points]
+        total = sum(weights)
+        x = sum(w * p[0] for w, p in zip(weights, xy)) / total
+        y = sum(w * p[1] for w, p in zip(weights, xy)) / total
+        for _ in range(iterations):
+            num_x = num_y = denom = 0.0
+            for w, (px, py) in zip(weights, xy):
+                d = math.hypot(px - x, py - y)
+                if d < 1e-6:
+                    return x, y
+                num_x += w * px / d
+                num_y += w * py / d
+                denom += w / d
+            x, y = num_x / denom, num_y / denom
+        return x, y
+
+    def _fill_area(self, point, category=None):
+        """만남 지점에 가장 가까운 장소의 동네('구 동')로 API 검색해 색인을 채움"""
+        hits = self.tree().nearest(*point, k=1)
+        if not hits:
+            return
+        area = area_name(hits[0][1])
+        if area is None:
+            return
+        query = f"{area} {category}" if category else area
+        if self.index.has_query(query) and not self.index.is_stale(query):
+            return
+        try:
+            search_places(area, 5, category)
+        except Exception as e:
+            print("❌ 만남 지점 주변 장소 검색 실패:", e)
+
+    def recommend(self, locations: list, display: int = 3, max_km: float = 2.0, category: str = None,
+                  widen_to_km: float = 8.0):
+        """언급된 지명들로 만남 지점을 정하고 가까운 장소를 거리순으로 반환
+
+        근처 장소가 부족하면 만남 지점 주변 동네로 색인을 채우고, 그래도 부족하면 반경을 두 배씩 넓힘
+        (기준 지명, 장소 목록) 을 반환하며, 좌표를 하나도 찾지 못하면 None
+        """
+        counts = Counter(locations)
+        located = {}
+        for loc in counts:
+            coord = self.geolocate(loc)
+            if coord:
+                located[loc] = coord
+        if not located:
+            return None
+
+        names = list(located)
+        point = self.meeting_point([located[n] for n in names], [counts[n] for n in names])
+        # 만남 지점에서 가장 가까운 지명을 안내 문구와 검색어로 사용
+        label = min(names, key=lambda n: math.dist(project(*located[n]), point))
+
+        accept = None
+        if category:
+            accept = lambda doc: category in doc.get("category", "")
+        hits = self.tree().nearest(*point, k=display, max_dist=max_km, accept=accept)
+        if len(hits) < display:
+            # 기준 지명 검색 결과는 이미 색인에 있으므로, 만남 지점 자체의 동네로 새로 검색
+            self._fill_area(point, category)
+            hits = self.tree().nearest(*point, k=display, max_dist=max_km, accept=accept)
+        radius = max_km
+        while len(hits) < display and radius < widen_to_km:
+            radius = min(radius * 2, widen_to_km)
+            hits = self.tree().nearest(*point, k=display, max_dist=radius, accept=accept)
+        places = []
+        for dist, doc in hits:
+            place = dict(doc)
+            place["distance"] = dist
+            places.append(place)
+        return label, places
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from collections import deque
+
+from model import intent_model
+
+
+class Speculator:
+    """대화가 잠잠해지거나 '+' 답장이 이어지면 /analyze 전에 미리 분석해 두는 기능
+
+    - 채팅마다 대화 버전을 두고, 메시지가 오거나 초기화되면 버전을 올림
+    - 미리 받은 결과는 (버전, 결과)로 저장해 버전이 같을 때만 /analyze 에서 사용
+    - 한 시간에 최대 budget_per_hour 번까지만 미리 분석 (GPT 비용 제한)
+    - 미리 분석은 GPT 작업 큐에서 낮은 우선순위(background)로 실행
+    """
+
+    def __init__(self, scheduler, tenant=None, enabled: bool = False, idle_seconds: float = 30.0,
+                 positive_run: int = 3, budget_per_hour: int = 30):
+        self.scheduler = scheduler
+        self.tenant = tenant
+        self.enabled = enabled
+        self.idle_seconds = idle_seconds
+        self.positive_run = positive_run
+        self.budget_per_hour = budget_per_hour
+
+        self.versions = {}    # cid -> 대화 버전
+        self._runs = {}       # cid -> 연속된 '+' 답장 수
+        self._timers = {}     # cid -> 디바운스 타이머
+        self._results = {}    # cid -> (버전, 결과)
+        self._inflight = {}   # cid -> (버전, Task)
+        self._spent = deque() # 최근 한 시간 동안 미리 분석한 시각
+
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.over_budget = 0
+
+    def note_message(self, cid, conv: list, text: str):
+        """새 메시지가 들어왔을 때 호출. 버전을 올리고 필요하면 미리 분석을 예약"""
+        self.versions[cid] = self.versions.get(cid, 0) + 1
+        if not self.enabled:
+            return
+        self._cancel_timer(cid)
+        if intent_model([text])[0] == "+":
+            self._runs[cid] = self._runs.get(cid, 0) + 1
+        else:
+            self._runs[cid] = 0
+        if self._runs[cid] >= self.positive_run:
+            # 다들 동의하는 분위기면 바로 분석
+            self._runs[cid] = 0
+            self._start(cid, conv)
+        else:
+            loop = asyncio.get_running_loop()
+            self._timers[cid] = loop.call_later(self.idle_seconds, self._start, cid, conv)
+
+    def invalidate(self, cid):
+        """대화가 초기화되거나 바뀌었을 때 호출. 예약과 저장된 결과를 버림"""
+        self.versions[cid] = self.versions.get(cid, 0) + 1
+        self._cancel_timer(cid)
+        self._runs.pop(cid, None)
+        self._results.pop(cid, None)
+
+    def _cancel_timer(self, cid):
+        timer = self._timers.pop(cid, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _take_budget(self) -> bool:
+        now = time.monotonic()
+        while self._spent and now - self._spent[0] > 3600:
+            self._spent.popleft()
+        if len(self._spent) >= self.budget_per_hour:
+            return False
+        self._spent.append(now)
+        return True
+
+    def _start(self, cid, conv: list):
+        self._timers.pop(cid, None)
+        version = self.versions.get(cid, 0)
+        if not conv or self._results.get(cid, (None,))[0] == version:
+            return
+        inflight = self._inflight.get(cid)
+        if inflight is not None and inflight[0] == version:
+            return
+        if not self._take_budget():
+            self.over_budget += 1
+            return
+        self.started += 1
+        texts = [d["text"] for d in conv]
+        task = asyncio.get_running_loop().create_task(self._run(cid, version, texts))
+        self._inflight[cid] = (version, task)
+
+    async def _run(self, cid, version: int, texts: list):
+        try:
+            result = await self.scheduler.submit(self._key(cid), texts, background=True)
+        except Exception as e:
+            print("⚠️ 미리 분석 실패:", e)
+            return None
+        finally:
+            if self._inflight.get(cid, (None,))[0] == version:
+                self._inflight.pop(cid, None)
+        # 빈 결과는 호출 실패일 수 있으므로 저장하지 않고 /analyze 때 다시 호출
+        if not result or not (result.get("available_times") or result.get("locations")):
+            return None
+        if self.versions.get(cid, 0) == version:
+            self._results[cid] = (version, result)
+        return result
+
+    def _key(self, cid):
+        return ("speculative", self.tenant, cid)
+
+    def version(self, cid) -> int:
+        return self.versions.get(cid, 0)
+
+    def store(self, cid, version: int, result: dict):
+        """/analyze 가 직접 받은 결과를 저장. 같은 대화로 다시 미리 분석하지 않도록 함"""
+        self._cancel_timer(cid)
+        self._runs.pop(cid, None)
+        if not result or not (result.get("available_times") or result.get("locations")):
+            return
+        if self.versions.get(cid, 0) == version:
+            self._results[cid] = (version, result)
+
+    async def get(self, cid):
+        """현재 버전의 미리 분석 결과. 진행 중이면 기다리고, 없으면 None
+
+        없을 때는 곧 /analyze 가 직접 분석하므로 예약된 미리 분석을 취소
+        """
+        version = self.versions.get(cid, 0)
+        cached = self._results.get(cid)
+        if cached is not None and cached[0] == version:
+            self.hits += 1
+            return cached[1]
+        inflight = self._inflight.get(cid)
+        if inflight is not None and inflight[0] == version:
+            # 사용자가 기다리는 중이므로 아직 대기 중이면 일반 요청과 같은 우선순위로 올림
+            self.scheduler.promote(self._key(cid))
+            result = await inflight[1]
+            if result is not None:
+                self.hits += 1
+                return result
+        if self.enabled:
+            self.misses += 1
+        self._cancel_timer(cid)
+        return None
+
+    def format_stats(self) -> str:
+        state = "켜짐" if self.enabled else "꺼짐"
+        return (
+            f"⚡ 미리 분석 ({state})\n"
+            f"- 실행: {self.started}회 (예산 초과로 건너뜀 {self.over_budget}회)\n"
+            f"- /analyze 적중/미적중: {self.hits}/{self.misses}"
+        )
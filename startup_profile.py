@@ -0,0 +1,90 @@
+"""시작 시간 측정 리포트
+
+python startup_profile.py
+
+1. 모듈별 import 시간 (각각 새 프로세스에서 python -X importtime 으로 측정)
+2. telegram_bot 이 직접 불러오는 모듈 중 무거운 순서
+3. 봇 시작 단계별 시간 (import → 상태 생성 → Application 생성) 과
+   시작 후 백그라운드로 미룬 작업(warm_up, 약속 로딩)의 시간
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+MODULES = ["telegram_bot", "multi_bot", "gpt_queue", "gpt", "model", "naver_api", "spatial",
+           "speculative", "availability", "intent_classifier"]
+
+
+def import_times(module: str) -> list:
+    """[(누적 µs, 깊이, 모듈명)] - 새 프로세스에서 측정"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((int(cumulative), depth, name.strip()))
+    return rows
+
+
+def children(rows: list, module: str) -> list:
+    """module 이 직접 불러온 모듈 행들 (importtime 은 자식이 부모보다 먼저 출력됨)"""
+    for i, (_, depth, name) in enumerate(rows):
+        if name == module:
+            break
+    else:
+        return []
+    direct = []
+    for row in reversed(rows[:i]):
+        if row[1] <= depth:
+            break
+        if row[1] == depth + 1:
+            direct.append(row)
+    return direct
+
+
+def report_imports():
+    print("📦 모듈별 import 시간 (새 프로세스 기준)")
+    for module in MODULES:
+        rows = import_times(module)
+        total = next((c for c, _, name in rows if name == module), None)
+        print(f"- {module:<18} {total / 1000:8.1f}ms" if total is not None else f"- {module:<18}   (실패)")
+
+    print("\n🔎 telegram_bot 이 직접 불러오는 모듈 (무거운 순)")
+    direct = sorted(children(import_times("telegram_bot"), "telegram_bot"), reverse=True)
+    for cumulative, _, name in direct[:10]:
+        print(f"- {name:<18} {cumulative / 1000:8.1f}ms")
+
+
+def report_startup():
+    print("\n🚀 봇 시작 단계")
+    t0 = time.perf_counter()
+    import telegram_bot
+    t1 = time.perf_counter()
+    state = telegram_bot.BotState("profile")
+    t2 = time.perf_counter()
+    telegram_bot.build_app("0:profile", state)
+    t3 = time.perf_counter()
+    print(f"- import telegram_bot   {(t1 - t0) * 1000:8.1f}ms")
+    print(f"- BotState 생성         {(t2 - t1) * 1000:8.1f}ms")
+    print(f"- Application 생성      {(t3 - t2) * 1000:8.1f}ms")
+    print(f"= 폴링 시작 전 합계     {(t3 - t0) * 1000:8.1f}ms (getMe 네트워크 호출 제외)")
+
+    print("\n⏳ 시작 후 백그라운드로 미룬 작업")
+    start = time.perf_counter()
+    asyncio.run(telegram_bot.ensure_appointments(state))
+    print(f"- 약속 파일 로딩        {(time.perf_counter() - start) * 1000:8.1f}ms")
+    start = time.perf_counter()
+    telegram_bot.warm_up()
+    print(f"- warm_up (numpy, 분류기 학습, 장소 색인, OpenAI 클라이언트) {(time.perf_counter() - start) * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    report_imports()
+    report_startup()
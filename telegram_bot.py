@@ -1,37 +1,106 @@
 import os
-from dotenv import load_dotenv
 from telegram import Update
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters, ContextTypes
-from gpt import analyze_dialogue
-from naver_api import search_places, format_places_for_message
+from gpt_queue import GPTScheduler, GPTRequestExpired
+from send_queue import Outbox
+from dialogue_log import DialogueLog
+from spatial import VenueLocator
+from speculative import Speculator
+from model import ner_model
+from naver_api import find_places, format_places_for_message, get_place_index
 import re
 from datetime import datetime, timedelta
 from collections import Counter
 import asyncio
 import json
+import time
 
-# .env 파일 로드 및 토큰 불러오기
-load_dotenv()
-TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
-
-app = ApplicationBuilder().token(TELEGRAM_TOKEN).build()
-
-dialogues = {}
-recommendation_cache = {}
+# 아래 객체들은 한 프로세스 안의 모든 봇이 함께 사용
+# GPT 호출은 모두 이 큐를 거쳐 동시 호출 수와 채팅 간 공정성을 보장 (.env 를 읽은 뒤 처음 쓸 때 생성)
+_gpt_scheduler = None
+_warm_up_task = None
+venue_locator = VenueLocator()
 weekdays = ["월요일", "화요일", "수요일", "목요일", "금요일", "토요일", "일요일"]
-appointments = {}
 
-def save_appointments():
-    with open('appointments.json', 'w', encoding='utf-8') as f:
-        json.dump(appointments, f, ensure_ascii=False, indent=2)
-
-def load_appointments():
-    global appointments
+def get_gpt_scheduler() -> GPTScheduler:
+    global _gpt_scheduler
+    if _gpt_scheduler is None:
+        _gpt_scheduler = GPTScheduler(
+            max_concurrency=int(os.getenv("GPT_MAX_CONCURRENCY", "4")),
+            default_deadline=float(os.getenv("GPT_DEADLINE_SECONDS", "60")),
+        )
+    return _gpt_scheduler
+
+class BotState:
+    """봇(토큰) 하나의 대화/약속 상태와 발송 큐, 지표"""
+
+    def __init__(self, name: str = None):
+        self.name = name
+        suffix = f"_{name}" if name else ""
+        self.dialogues = {}
+        self.recommendation_cache = {}
+        self.appointments = {}
+        self.appointments_path = f"appointments{suffix}.json"
+        # 약속 파일은 시작 후 백그라운드에서 읽음 (약속이 필요한 명령은 읽기가 끝날 때까지 대기)
+        self.appointments_task = None
+        # 디스크 복구가 끝나기 전에 초기화된 채팅 (복구가 끝나면 None)
+        self.cleared_before_restore = set()
+        # 모든 응답은 발송 큐를 거쳐 텔레그램 전송 제한을 지키며 나감 (제한은 봇마다 따로 적용됨)
+        self.outbox = Outbox()
+        # 재시작해도 진행 중인 대화가 남도록 디스크에 기록
+        self.dialogue_log = DialogueLog(root=f"dialogue_logs{suffix}")
+        # SPECULATIVE_ANALYSIS=1 이면 대화가 잠잠해질 때 미리 분석해 /analyze 를 바로 응답
+        self.speculator = Speculator(
+            get_gpt_scheduler(),
+            tenant=name,
+            enabled=os.getenv("SPECULATIVE_ANALYSIS", "0") == "1",
+            idle_seconds=float(os.getenv("SPECULATIVE_IDLE_SECONDS", "30")),
+            budget_per_hour=int(os.getenv("SPECULATIVE_BUDGET_PER_HOUR", "30")),
+        )
+        self.metrics = Counter()
+        # 시작 시 띄운 백그라운드 작업 (참조를 유지해야 중간에 사라지지 않음)
+        self.background_tasks = set()
+
+    def spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+        return task
+
+    def gpt_key(self, cid):
+        # 같은 사용자/그룹이라도 봇이 다르면 채팅 id 가 같으므로 봇 이름으로 구분
+        return (self.name, cid)
+
+    def format_metrics(self) -> str:
+        m = self.metrics
+        avg_gpt = m["gpt_seconds"] / m["gpt_calls"] if m["gpt_calls"] else 0.0
+        return (
+            f"🤖 봇 '{self.name or 'default'}'\n"
+            f"- 대화 중인 채팅: {sum(1 for d in self.dialogues.values() if d)}개, 약속: {len(self.appointments)}개\n"
+            f"- 받은 메시지: {m['messages']}건, /analyze: {m['analyze']}회, /finalize: {m['finalize']}회\n"
+            f"- GPT 호출: {m['gpt_calls']}회 (평균 {avg_gpt:.2f}s), 미리 분석 사용: {m['speculative_hits']}회"
+        )
+
+def get_state(context: ContextTypes.DEFAULT_TYPE) -> BotState:
+    return context.application.bot_data["state"]
+
+def save_appointments(state: BotState):
+    with open(state.appointments_path, 'w', encoding='utf-8') as f:
+        json.dump(state.appointments, f, ensure_ascii=False, indent=2)
+
+def load_appointments(state: BotState):
     try:
-        with open('appointments.json', 'r', encoding='utf-8') as f:
-            appointments = json.load(f)
+        with open(state.appointments_path, 'r', encoding='utf-8') as f:
+            # JSON 키는 문자열이므로 채팅 id(int)로 되돌림
+            state.appointments = {int(cid): a for cid, a in json.load(f).items()}
     except FileNotFoundError:
-        appointments = {}
+        state.appointments = {}
+
+async def ensure_appointments(state: BotState):
+    """약속 파일 읽기를 (아직 안 했다면 시작하고) 끝날 때까지 기다림"""
+    if state.appointments_task is None:
+        state.appointments_task = asyncio.ensure_future(asyncio.to_thread(load_appointments, state))
+    await state.appointments_task
 
 def resolve_date_with_weekday(weekday_name: str, reference_date: datetime) -> str:
     weekday_name = weekday_name.strip()
@@ -56,34 +125,85 @@ def resolve_date_with_weekday(weekday_name: str, reference_date: datetime) -> st
 def normalize_time_str(t: str) -> str:
     return re.sub(r"[시:\s분]", "", t)
 
+def reset_dialogue(state: BotState, cid):
+    state.dialogues[cid] = []
+    state.recommendation_cache.pop(cid, None)
+    state.dialogue_log.truncate(cid)
+    state.speculator.invalidate(cid)
+    if state.cleared_before_restore is not None:
+        state.cleared_before_restore.add(cid)
+
+def reply(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str):
+    # 기다리지 않고 큐에 넣기만 해서, 연달아 보내는 메시지는 한 번에 합쳐 전송됨
+    # reply_text 처럼 그룹 채팅에서는 명령 메시지에 답장으로 보냄
+    chat = update.effective_chat
+    reply_to = update.effective_message.message_id if chat.type != "private" else None
+    return get_state(context).outbox.send(context.bot, chat.id, text, reply_to)
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text("✅ GO!비서 챗봇이 시작되었습니다!")
+    reply(update, context, "✅ GO!비서 챗봇이 시작되었습니다!")
 
 async def clear(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = get_state(context)
     cid = update.effective_chat.id
-    dialogues[cid] = []
-    recommendation_cache.pop(cid, None)
-    await update.message.reply_text("🧹 대화 기록이 초기화되었습니다!")
+    reset_dialogue(state, cid)
+    reply(update, context, "🧹 대화 기록이 초기화되었습니다!")
 
 async def receive_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = get_state(context)
     cid = update.effective_chat.id
     txt = update.message.text.strip()
-    if cid not in dialogues:
-        dialogues[cid] = []
+    if cid not in state.dialogues:
+        state.dialogues[cid] = []
     person = str(update.message.from_user.first_name or update.message.from_user.id)
-    dialogues[cid].append({"person": person, "text": txt})
+    state.dialogues[cid].append({"person": person, "text": txt})
+    state.dialogue_log.append(cid, person, txt)
+    state.speculator.note_message(cid, state.dialogues[cid], txt)
+    state.metrics["messages"] += 1
 
 async def analyze(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # 시간 후보와 장소 추천은 장소 검색이 오래 걸려도 한 메시지로 합쳐 보냄
+    with get_state(context).outbox.hold(context.bot, update.effective_chat.id):
+        await _analyze(update, context)
+
+async def _analyze(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = get_state(context)
     cid = update.effective_chat.id
-    conv = dialogues.get(cid, [])
+    conv = state.dialogues.get(cid, [])
     if not conv:
-        await update.message.reply_text("❗ 분석할 대화가 없습니다.")
+        reply(update, context, "❗ 분석할 대화가 없습니다.")
         return
 
     texts = [d["text"] for d in conv]
-    result = analyze_dialogue(texts)
+    # 대화가 바뀌지 않았다면 미리 분석해 둔 결과를 그대로 사용
+    state.metrics["analyze"] += 1
+    version = state.speculator.version(cid)
+    result = await state.speculator.get(cid)
+    if result is not None:
+        state.metrics["speculative_hits"] += 1
+    else:
+        started = time.monotonic()
+        try:
+            result = await get_gpt_scheduler().submit(state.gpt_key(cid), texts)
+        except GPTRequestExpired as e:
+            # 같은 채팅의 더 최근 /analyze 가 대신 응답하므로 조용히 종료
+            if e.reason == "superseded":
+                return
+            reply(update, context, "⏳ 분석 요청이 밀려 시간이 초과되었습니다. 잠시 후 다시 /analyze 해주세요.")
+            return
+        state.metrics["gpt_calls"] += 1
+        state.metrics["gpt_seconds"] += time.monotonic() - started
+        # 대화가 그대로면 다음 /analyze 와 미리 분석이 이 결과를 재사용
+        state.speculator.store(cid, version, result)
 
     times = result.get("available_times", [])
+    # 시간을 언급한 참여자 전원이 가능한 칸을 로컬 계산으로 찾으면 GPT 결과보다 우선
+    # 단, 모두가 시각까지 말한 경우에만 (아니면 기본 시각으로 고른 칸이라 GPT 결과가 더 정확)
+    # GPT 가 후보를 못 찾았으면 로컬 결과로 채움
+    from availability import find_common_times, format_slot  # numpy 는 필요할 때 불러옴
+    local = find_common_times(conv)
+    if local and local[0]["count"] == local[0]["total"] >= 2 and (local[0]["timed"] or not times):
+        times = [format_slot(c["datetime"]) for c in local if c["count"] == local[0]["count"]]
     reference_date = datetime.now()
     time_strings = []
 
@@ -127,35 +247,45 @@ async def analyze(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     break
 
     if time_strings:
-        recommendation_cache[cid] = times[:4]
-        await update.message.reply_text("🧠 분석 완료!\n📅 후보 시간:\n" + "\n".join(time_strings[:4]) + "\n\n최종 확정을 원하면 /finalize")
+        state.recommendation_cache[cid] = times[:4]
+        reply(update, context, "🧠 분석 완료!\n📅 후보 시간:\n" + "\n".join(time_strings[:4]) + "\n\n최종 확정을 원하면 /finalize")
     else:
-        await update.message.reply_text("❌ 공통 가능한 시간이 없습니다.")
+        reply(update, context, "❌ 공통 가능한 시간이 없습니다.")
 
     locations = result.get("locations", [])
     locs = [l["location"].replace("역", "").replace("앞", "").strip()
             for l in locations if l["sentiment"] in ("positive", "neutral")]
     if not locs:
-        await update.message.reply_text("❗ 장소 정보가 부족합니다.")
+        reply(update, context, "❗ 장소 정보가 부족합니다.")
         return
 
-    keyword = Counter(locs).most_common(1)[0][0]
-    places = search_places(keyword)
+    # 대화에 '카페' 처럼 업종이 나오면 그 업종으로 찾음 (없으면 맛집)
+    kinds = [word for ents in ner_model(texts) for word, tag in ents if tag == "PLACE"]
+    category = kinds[-1] if kinds else None
+
+    # 언급된 지명들의 만남 지점 기준으로 가까운 장소를 추천, 좌표를 못 찾으면 최다 언급 지명으로 검색
+    recommended = await asyncio.to_thread(venue_locator.recommend, locs, category=category)
+    if recommended and recommended[1]:
+        keyword, places = recommended
+    else:
+        keyword = Counter(locs).most_common(1)[0][0]
+        places = await asyncio.to_thread(find_places, keyword, 3, category)
 
     if places:
         msg = f"📍 '{keyword}' 추천 장소:\n\n" + format_places_for_message(places)
-        await update.message.reply_text(msg)
+        reply(update, context, msg)
     else:
-        await update.message.reply_text(f"🔍 '{keyword}' 검색 결과가 없습니다.")
+        reply(update, context, f"🔍 '{keyword}' 검색 결과가 없습니다.")
 
 async def finalize(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = get_state(context)
     cid = update.effective_chat.id
-    cands = recommendation_cache.get(cid)
+    cands = state.recommendation_cache.get(cid)
     if not cands:
-        await update.message.reply_text("❗ 먼저 /analyze 를 실행하세요.")
+        reply(update, context, "❗ 먼저 /analyze 를 실행하세요.")
         return
 
-    msgs = [d["text"] for d in dialogues.get(cid, [])[::-1]]
+    msgs = [d["text"] for d in state.dialogues.get(cid, [])[::-1]]
     final = cands[0]
 
     for m in msgs:
@@ -182,50 +312,55 @@ async def finalize(update: Update, context: ContextTypes.DEFAULT_TYPE):
             date_str, time_str = None, None
 
     if date_str and time_str:
-        appointments[cid] = {
+        await ensure_appointments(state)
+        state.appointments[cid] = {
             'date': date_str,
             'time': time_str,
             'reminder_sent': False,
             'same_day_reminder_sent': False,
             'reminder_enabled': False
         }
-        save_appointments()
+        save_appointments(state)
 
-    await update.message.reply_text(
+    reply(update, context,
         f"✅ 최종 약속 시간은 다음과 같습니다:\n"
         f"🕒 {final}\n\n"
         f"리마인드를 설정하려면 /remind 명령어를 사용하세요."
     )
-    dialogues[cid] = []
-    recommendation_cache.pop(cid, None)
+    reset_dialogue(state, cid)
+    state.metrics["finalize"] += 1
 
 async def remind(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = get_state(context)
     cid = update.effective_chat.id
-    if cid not in appointments:
-        await update.message.reply_text("❗ 설정된 약속이 없습니다. 먼저 /finalize 명령어로 약속을 확정하세요.")
+    await ensure_appointments(state)
+    if cid not in state.appointments:
+        reply(update, context, "❗ 설정된 약속이 없습니다. 먼저 /finalize 명령어로 약속을 확정하세요.")
         return
 
-    appointment = appointments[cid]
+    appointment = state.appointments[cid]
     if appointment.get('reminder_enabled'):
-        await update.message.reply_text(f"❗ 이미 리마인드가 설정되어 있습니다.\n\n📅 현재 약속: {appointment['date']} {appointment['time']}")
+        reply(update, context, f"❗ 이미 리마인드가 설정되어 있습니다.\n\n📅 현재 약속: {appointment['date']} {appointment['time']}")
         return
 
     appointment['reminder_enabled'] = True
     appointment['reminder_sent'] = False
     appointment['same_day_reminder_sent'] = False
-    save_appointments()
+    save_appointments(state)
 
-    await update.message.reply_text(
+    reply(update, context,
         f"✅ 리마인드가 설정되었습니다!\n\n📅 약속: {appointment['date']} {appointment['time']}\n🔔 리마인드는 전날 오전 9시 및 당일 오전 9시에 전송됩니다."
     )
 
 async def reminders(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = get_state(context)
     cid = update.effective_chat.id
-    if cid not in appointments:
-        await update.message.reply_text("❗ 설정된 약속이 없습니다.")
+    await ensure_appointments(state)
+    if cid not in state.appointments:
+        reply(update, context, "❗ 설정된 약속이 없습니다.")
         return
 
-    appointment = appointments[cid]
+    appointment = state.appointments[cid]
     date = appointment['date']
     time = appointment['time']
     enabled = appointment.get('reminder_enabled', False)
@@ -239,33 +374,99 @@ async def reminders(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"- 전날 리마인드: {'✅ 전송됨' if sent else '⏳ 대기 중'}\n"
         f"- 당일 리마인드: {'✅ 전송됨' if same_day else '⏳ 대기 중'}"
     )
-    await update.message.reply_text(status)
+    reply(update, context, status)
 
 async def remind_off(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = get_state(context)
     cid = update.effective_chat.id
-    if cid not in appointments:
-        await update.message.reply_text("❗ 설정된 약속이 없습니다.")
+    await ensure_appointments(state)
+    if cid not in state.appointments:
+        reply(update, context, "❗ 설정된 약속이 없습니다.")
         return
 
-    appointment = appointments[cid]
+    appointment = state.appointments[cid]
     if not appointment.get('reminder_enabled'):
-        await update.message.reply_text("⚠️ 리마인드가 이미 비활성화되어 있습니다.")
+        reply(update, context, "⚠️ 리마인드가 이미 비활성화되어 있습니다.")
         return
 
     appointment['reminder_enabled'] = False
-    save_appointments()
-    await update.message.reply_text(f"🚫 리마인드가 비활성화되었습니다.\n📅 약속: {appointment['date']} {appointment['time']}")
-
-app.add_handler(CommandHandler("start", start))
-app.add_handler(CommandHandler("clear", clear))
-app.add_handler(CommandHandler("analyze", analyze))
-app.add_handler(CommandHandler("finalize", finalize))
-app.add_handler(CommandHandler("remind", remind))
-app.add_handler(CommandHandler("reminders", reminders))
-app.add_handler(CommandHandler("remind_off", remind_off))
-app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, receive_message))
+    save_appointments(state)
+    reply(update, context, f"🚫 리마인드가 비활성화되었습니다.\n📅 약속: {appointment['date']} {appointment['time']}")
+
+async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = get_state(context)
+    reply(update, context, "\n\n".join([
+        state.format_metrics(),
+        get_gpt_scheduler().format_stats(),
+        state.outbox.format_stats(),
+        state.speculator.format_stats(),
+    ]))
+
+async def restore_dialogues(state: BotState):
+    try:
+        restored = await state.dialogue_log.load()
+    except OSError as e:
+        print("❌ 대화 기록 복구 실패:", e)
+        restored = {}
+    for cid, messages in restored.items():
+        # 복구 중에 초기화된 채팅은 되살리지 않고, 그 사이 받은 메시지는 뒤에 이어 붙임
+        if cid in state.cleared_before_restore:
+            continue
+        state.dialogues[cid] = messages + state.dialogues.get(cid, [])
+        state.speculator.invalidate(cid)
+    state.cleared_before_restore = None
+    print(f"💾 [{state.name or 'default'}] 대화 기록 복구 완료: {len(restored)}개 채팅")
+
+def warm_up():
+    """첫 /analyze 가 느리지 않도록 무거운 모듈과 클라이언트를 미리 준비 (백그라운드 스레드)"""
+    from gpt import get_client
+    from model import intent_model
+    import availability  # noqa: F401  (numpy)
+
+    intent_model(["준비"])
+    get_place_index()
+    try:
+        get_client()
+    except Exception as e:
+        print("⚠️ OpenAI 클라이언트 준비 실패:", e)
+
+async def post_init(application):
+    global _warm_up_task
+    # 복구/로딩을 기다리지 않고 바로 폴링을 시작
+    state = application.bot_data["state"]
+    state.spawn(restore_dialogues(state))
+    state.spawn(ensure_appointments(state))
+    # 여러 봇을 함께 띄워도 warm_up 은 프로세스에서 한 번만
+    if _warm_up_task is None:
+        _warm_up_task = state.spawn(asyncio.to_thread(warm_up))
+
+async def post_stop(application):
+    # 봇 연결이 닫히기 전에 발송 큐에 남은 응답을 마저 보냄
+    await application.bot_data["state"].outbox.drain()
+
+async def post_shutdown(application):
+    await application.bot_data["state"].dialogue_log.flush()
+
+def build_app(token: str, state: BotState = None):
+    """토큰 하나에 대한 Application 을 만든다. 상태는 bot_data["state"] 에 보관"""
+    state = state or BotState()
+    app = ApplicationBuilder().token(token).post_init(post_init).post_stop(post_stop).post_shutdown(post_shutdown).build()
+    app.bot_data["state"] = state
+    app.add_handler(CommandHandler("start", start))
+    app.add_handler(CommandHandler("clear", clear))
+    app.add_handler(CommandHandler("analyze", analyze))
+    app.add_handler(CommandHandler("finalize", finalize))
+    app.add_handler(CommandHandler("remind", remind))
+    app.add_handler(CommandHandler("reminders", reminders))
+    app.add_handler(CommandHandler("remind_off", remind_off))
+    app.add_handler(CommandHandler("stats", stats))
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, receive_message))
+    return app
 
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    # .env 파일 로드 및 토큰 불러오기
+    load_dotenv()
     print("GO!비서 실행 중...")
-    load_appointments()
-    app.run_polling(drop_pending_updates=True)
+    build_app(os.getenv("TELEGRAM_TOKEN")).run_polling(drop_pending_updates=True)